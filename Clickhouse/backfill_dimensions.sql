@@ -0,0 +1,23 @@
+-- Backfill the dimension tables from data loaded before they existed.
+-- Safe to re-run: the AggregatingMergeTree tables merge duplicate keys
+-- into a single row with the min/max first_seen/last_seen.
+
+USE scamper;
+
+INSERT INTO dim_vps
+SELECT 'ping' AS kind, vp, min(timestamp), max(timestamp) FROM ping_measurements GROUP BY vp;
+
+INSERT INTO dim_vps
+SELECT 'trace' AS kind, vp, min(timestamp), max(timestamp) FROM traceroute_measurements GROUP BY vp;
+
+INSERT INTO dim_vps
+SELECT 'dns' AS kind, vp, min(timestamp), max(timestamp) FROM dns_measurements GROUP BY vp;
+
+INSERT INTO dim_destinations
+SELECT 'ping' AS kind, destination, min(timestamp), max(timestamp) FROM ping_measurements GROUP BY destination;
+
+INSERT INTO dim_destinations
+SELECT 'trace' AS kind, destination, min(timestamp), max(timestamp) FROM traceroute_measurements GROUP BY destination;
+
+INSERT INTO dim_nameservers
+SELECT nameserver, min(timestamp), max(timestamp) FROM dns_measurements GROUP BY nameserver;
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark Grafana dashboard queries before/after the dimension tables
+Loads a large synthetic dataset into a scratch database and times the old
+(string-converting, SELECT DISTINCT) and new (native IPv6, dim_*) queries
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+
+try:
+    from clickhouse_driver import Client
+except ImportError as e:
+    print(f"Missing required dependencies: {e}")
+    sys.exit(1)
+
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Synthetic data spread over the last week: 50 VPs, 500 IPv4-mapped targets
+PING_INSERT = """
+INSERT INTO ping_measurements
+SELECT
+    toDateTime64(now() - number % 604800, 3) AS timestamp,
+    concat('ping_', toString(number)) AS measurement_id,
+    concat('vp', toString(number % 50), '.ark.caida.org') AS vp,
+    toIPv6('192.168.1.100') AS source,
+    toIPv6(IPv4NumToString(toUInt32(167772160 + number % 500))) AS destination,
+    10 + rand() % 100 AS rtt_avg,
+    rtt_avg * 0.9 AS rtt_min,
+    rtt_avg * 1.1 AS rtt_max,
+    if(number % 20 = 0, 0.5, 0) AS packet_loss,
+    3 AS probe_count,
+    56 AS probe_size
+FROM numbers({rows})
+"""
+
+DNS_INSERT = """
+INSERT INTO dns_measurements
+SELECT
+    toDateTime64(now() - number % 604800, 3) AS timestamp,
+    concat('dns_', toString(number)) AS measurement_id,
+    concat('vp', toString(number % 50), '.ark.caida.org') AS vp,
+    concat('q', toString(number % 100), '.example') AS query_name,
+    'NS' AS query_type,
+    toIPv6(IPv4NumToString(toUInt32(167772160 + number % 500))) AS nameserver,
+    if(number % 20 = 0, 2, 0) AS response_code,
+    1 + rand() % 100 AS rtt,
+    2 AS answer_count,
+    0 AS authority_count,
+    1 AS additional_count
+FROM numbers({rows})
+"""
+
+# Grafana macros expanded for a 6 hour window and a few selected values
+WINDOW = "( timestamp >= now() - INTERVAL 6 HOUR AND timestamp <= now() )"
+TARGETS = "'::ffff:10.0.0.1', '::ffff:10.0.0.2', '::ffff:10.0.0.3'"
+VPS = "'vp1.ark.caida.org', 'vp2.ark.caida.org'"
+
+QUERIES = [
+    ('arkvp variable',
+     "select distinct vp from dns_measurements",
+     "SELECT DISTINCT vp FROM dim_vps WHERE kind = 'dns' ORDER BY vp"),
+    ('nameserver variable',
+     "select distinct IPv6NumToString(nameserver) from dns_measurements",
+     "SELECT DISTINCT IPv6NumToString(nameserver) AS nameserver FROM dim_nameservers ORDER BY nameserver"),
+    ('ping panel',
+     f"SELECT timestamp, rtt_min ,vp, destination As monitor FROM ping_measurements where {WINDOW} "
+     f"and IPv6NumToString(destination) IN ({TARGETS}) and vp IN ({VPS}) order by timestamp",
+     f"SELECT timestamp, rtt_min ,vp, destination As monitor FROM ping_measurements where {WINDOW} "
+     f"and destination IN ({TARGETS}) and vp IN ({VPS}) order by timestamp"),
+    ('dns panel',
+     f"SELECT timestamp, rtt ,vp, nameserver As monitor FROM dns_measurements where {WINDOW} "
+     f"and IPv6NumToString(nameserver) IN ({TARGETS}) and vp IN ({VPS}) order by timestamp",
+     f"SELECT timestamp, rtt ,vp, nameserver As monitor FROM dns_measurements where {WINDOW} "
+     f"and nameserver IN ({TARGETS}) and vp IN ({VPS}) order by timestamp"),
+]
+
+
+def schema_statements():
+    """Split schema.sql into single statements for the scratch database"""
+    with open(SCHEMA_FILE) as f:
+        sql = re.sub(r'--.*', '', f.read())
+    for statement in sql.split(';'):
+        statement = statement.strip()
+        if not statement or statement.startswith(('CREATE DATABASE', 'USE ')):
+            continue
+        yield statement
+
+
+def timed(client: Client, query: str, runs: int):
+    """Median wall time in ms and rows read for a query"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        client.execute(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), client.last_query.progress.rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard queries before/after dimension tables')
+    parser.add_argument('--host', default='localhost', help='ClickHouse host')
+    parser.add_argument('--port', type=int, default=9000, help='ClickHouse port')
+    parser.add_argument('--database', default='scamper_bench', help='Scratch database (dropped and recreated)')
+    parser.add_argument('--rows', type=int, default=50_000_000, help='Synthetic rows per measurement table')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per query')
+
+    args = parser.parse_args()
+
+    client = Client(host=args.host, port=args.port)
+    client.execute(f'DROP DATABASE IF EXISTS {args.database}')
+    client.execute(f'CREATE DATABASE {args.database}')
+    client = Client(host=args.host, port=args.port, database=args.database)
+
+    for statement in schema_statements():
+        client.execute(statement)
+
+    print(f"Loading {args.rows:,} synthetic rows into ping_measurements and dns_measurements...")
+    client.execute(PING_INSERT.format(rows=args.rows))
+    client.execute(DNS_INSERT.format(rows=args.rows))
+
+    print(f"{'query':<22}{'before ms':>12}{'after ms':>12}{'rows before':>16}{'rows after':>14}")
+    for name, before, after in QUERIES:
+        before_ms, before_rows = timed(client, before, args.runs)
+        after_ms, after_rows = timed(client, after, args.runs)
+        print(f"{name:<22}{before_ms:>12.1f}{after_ms:>12.1f}{before_rows:>16,}{after_rows:>14,}")
+
+    client.execute(f'DROP DATABASE IF EXISTS {args.database}')
+
+
+if __name__ == '__main__':
+    main()
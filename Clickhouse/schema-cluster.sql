@@ -0,0 +1,209 @@
+-- ClickHouse schema for scamper measurements on a sharded cluster
+-- (see docker-compose.cluster.yml and Clickhouse/cluster/)
+--
+-- Every table has a replicated *_local table on each shard and a Distributed
+-- table with the single-node name in front of it, so Grafana and the query
+-- API work unchanged. Ping, DNS and rtt_events rows are sharded by
+-- cityHash64(vp); traceroute measurements and hops are sharded by
+-- cityHash64(measurement_id) so a trace and its hops live on the same shard.
+-- WartsClickHouseLoader --shard uses the same keys to write straight into
+-- the owning shard's *_local table.
+
+-- Create (if needed) and use the Scamper database
+CREATE DATABASE IF NOT EXISTS scamper ON CLUSTER scamper_cluster;
+USE scamper;
+
+-- Ping measurements table
+CREATE TABLE IF NOT EXISTS ping_measurements_local ON CLUSTER scamper_cluster (
+    timestamp DateTime64(3),
+    measurement_id String,
+    vp String,
+    source IPv6,
+    destination IPv6,
+    rtt_avg Float32,
+    rtt_min Float32,
+    rtt_max Float32,
+    packet_loss Float32,
+    probe_count UInt16,
+    probe_size UInt16
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/scamper/ping_measurements', '{replica}')
+PARTITION BY toYYYYMM(timestamp)
+ORDER BY (timestamp, destination)
+SETTINGS index_granularity = 8192;
+
+CREATE TABLE IF NOT EXISTS ping_measurements ON CLUSTER scamper_cluster
+AS ping_measurements_local
+ENGINE = Distributed(scamper_cluster, scamper, ping_measurements_local, cityHash64(vp));
+
+-- Traceroute measurements table
+CREATE TABLE IF NOT EXISTS traceroute_measurements_local ON CLUSTER scamper_cluster (
+    timestamp DateTime64(3),
+    measurement_id String,
+    vp String,
+    source IPv6,
+    destination IPv6,
+    hop_count UInt8,
+    completed UInt8
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/scamper/traceroute_measurements', '{replica}')
+PARTITION BY toYYYYMM(timestamp)
+ORDER BY (timestamp, destination)
+SETTINGS index_granularity = 8192;
+
+CREATE TABLE IF NOT EXISTS traceroute_measurements ON CLUSTER scamper_cluster
+AS traceroute_measurements_local
+ENGINE = Distributed(scamper_cluster, scamper, traceroute_measurements_local, cityHash64(measurement_id));
+
+-- Traceroute hops table (detailed hop information)
+CREATE TABLE IF NOT EXISTS traceroute_hops_local ON CLUSTER scamper_cluster (
+    timestamp DateTime64(3),
+    measurement_id String,
+    source IPv6,
+    destination IPv6,
+    hop_number UInt8,
+    rtt Float32,
+    probe_ttl UInt8,
+    icmp_type Nullable(UInt8),
+    icmp_code Nullable(UInt8)
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/scamper/traceroute_hops', '{replica}')
+PARTITION BY toYYYYMM(timestamp)
+ORDER BY (timestamp, destination, hop_number)
+SETTINGS index_granularity = 8192;
+
+CREATE TABLE IF NOT EXISTS traceroute_hops ON CLUSTER scamper_cluster
+AS traceroute_hops_local
+ENGINE = Distributed(scamper_cluster, scamper, traceroute_hops_local, cityHash64(measurement_id));
+
+-- DNS measurements table (for RFC2182 analysis)
+CREATE TABLE IF NOT EXISTS dns_measurements_local ON CLUSTER scamper_cluster (
+    timestamp DateTime64(3),
+    measurement_id String,
+    vp String,
+    query_name String,
+    query_type String,
+    nameserver IPv6,
+    response_code UInt16,
+    rtt Float32,
+    answer_count UInt16,
+    authority_count UInt16,
+    additional_count UInt16
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/scamper/dns_measurements', '{replica}')
+PARTITION BY toYYYYMM(timestamp)
+ORDER BY (timestamp, query_name)
+SETTINGS index_granularity = 8192;
+
+CREATE TABLE IF NOT EXISTS dns_measurements ON CLUSTER scamper_cluster
+AS dns_measurements_local
+ENGINE = Distributed(scamper_cluster, scamper, dns_measurements_local, cityHash64(vp));
+
+-- RTT baseline change events (written by the loader with --baselines)
+CREATE TABLE IF NOT EXISTS rtt_events_local ON CLUSTER scamper_cluster (
+    timestamp DateTime64(3),
+    kind LowCardinality(String),
+    vp String,
+    target IPv6,
+    event LowCardinality(String),
+    baseline_rtt Float32,
+    current_rtt Float32,
+    baseline_p95 Float32,
+    loss_rate Float32,
+    sample_count UInt64
+) ENGINE = ReplicatedMergeTree('/clickhouse/tables/{shard}/scamper/rtt_events', '{replica}')
+PARTITION BY toYYYYMM(timestamp)
+ORDER BY (timestamp, vp, target)
+SETTINGS index_granularity = 8192;
+
+CREATE TABLE IF NOT EXISTS rtt_events ON CLUSTER scamper_cluster
+AS rtt_events_local
+ENGINE = Distributed(scamper_cluster, scamper, rtt_events_local, cityHash64(vp));
+
+-- Dimension tables for Grafana template variables
+-- Each shard keeps the values seen in its own *_local tables; the Distributed
+-- tables merge them, which is still tiny compared to the raw measurements
+CREATE TABLE IF NOT EXISTS dim_vps_local ON CLUSTER scamper_cluster (
+    kind LowCardinality(String),
+    vp String,
+    first_seen SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen SimpleAggregateFunction(max, DateTime64(3))
+) ENGINE = ReplicatedAggregatingMergeTree('/clickhouse/tables/{shard}/scamper/dim_vps', '{replica}')
+ORDER BY (kind, vp);
+
+CREATE TABLE IF NOT EXISTS dim_vps ON CLUSTER scamper_cluster
+AS dim_vps_local
+ENGINE = Distributed(scamper_cluster, scamper, dim_vps_local, cityHash64(vp));
+
+CREATE TABLE IF NOT EXISTS dim_destinations_local ON CLUSTER scamper_cluster (
+    kind LowCardinality(String),
+    destination IPv6,
+    first_seen SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen SimpleAggregateFunction(max, DateTime64(3))
+) ENGINE = ReplicatedAggregatingMergeTree('/clickhouse/tables/{shard}/scamper/dim_destinations', '{replica}')
+ORDER BY (kind, destination);
+
+CREATE TABLE IF NOT EXISTS dim_destinations ON CLUSTER scamper_cluster
+AS dim_destinations_local
+ENGINE = Distributed(scamper_cluster, scamper, dim_destinations_local, cityHash64(destination));
+
+CREATE TABLE IF NOT EXISTS dim_nameservers_local ON CLUSTER scamper_cluster (
+    nameserver IPv6,
+    first_seen SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen SimpleAggregateFunction(max, DateTime64(3))
+) ENGINE = ReplicatedAggregatingMergeTree('/clickhouse/tables/{shard}/scamper/dim_nameservers', '{replica}')
+ORDER BY nameserver;
+
+CREATE TABLE IF NOT EXISTS dim_nameservers ON CLUSTER scamper_cluster
+AS dim_nameservers_local
+ENGINE = Distributed(scamper_cluster, scamper, dim_nameservers_local, cityHash64(nameserver));
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_vps_ping_mv ON CLUSTER scamper_cluster TO dim_vps_local AS
+SELECT 'ping' AS kind, vp, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM ping_measurements_local
+GROUP BY vp;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_vps_trace_mv ON CLUSTER scamper_cluster TO dim_vps_local AS
+SELECT 'trace' AS kind, vp, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM traceroute_measurements_local
+GROUP BY vp;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_vps_dns_mv ON CLUSTER scamper_cluster TO dim_vps_local AS
+SELECT 'dns' AS kind, vp, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM dns_measurements_local
+GROUP BY vp;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_destinations_ping_mv ON CLUSTER scamper_cluster TO dim_destinations_local AS
+SELECT 'ping' AS kind, destination, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM ping_measurements_local
+GROUP BY destination;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_destinations_trace_mv ON CLUSTER scamper_cluster TO dim_destinations_local AS
+SELECT 'trace' AS kind, destination, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM traceroute_measurements_local
+GROUP BY destination;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_nameservers_mv ON CLUSTER scamper_cluster TO dim_nameservers_local AS
+SELECT nameserver, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM dns_measurements_local
+GROUP BY nameserver;
+
+-- Create views for common analytics queries
+CREATE VIEW IF NOT EXISTS ping_stats ON CLUSTER scamper_cluster AS
+SELECT
+    toStartOfHour(timestamp) as hour,
+    destination,
+    avg(rtt_avg) as avg_rtt,
+    min(rtt_min) as min_rtt,
+    max(rtt_max) as max_rtt,
+    avg(packet_loss) as avg_loss,
+    count() as measurement_count
+FROM ping_measurements
+GROUP BY hour, destination;
+
+CREATE VIEW IF NOT EXISTS dns_robustness ON CLUSTER scamper_cluster AS
+SELECT
+    toStartOfDay(timestamp) as day,
+    query_name,
+    uniq(nameserver) as unique_nameservers,
+    countIf(response_code = 0) as successful_queries,
+    count() as total_queries
+FROM dns_measurements
+WHERE query_type = 'NS'
+GROUP BY day, query_name;
@@ -70,6 +70,79 @@ PARTITION BY toYYYYMM(timestamp)
 ORDER BY (timestamp, query_name)
 SETTINGS index_granularity = 8192;
 
+-- RTT baseline change events (written by the loader with --baselines)
+CREATE TABLE IF NOT EXISTS rtt_events (
+    timestamp DateTime64(3),
+    kind LowCardinality(String),
+    vp String,
+    target IPv6,
+    event LowCardinality(String),
+    baseline_rtt Float32,
+    current_rtt Float32,
+    baseline_p95 Float32,
+    loss_rate Float32,
+    sample_count UInt64
+) ENGINE = MergeTree()
+PARTITION BY toYYYYMM(timestamp)
+ORDER BY (timestamp, vp, target)
+SETTINGS index_granularity = 8192;
+
+-- Dimension tables for Grafana template variables
+-- Fed incrementally by the materialized views below, so dashboards never
+-- need SELECT DISTINCT over the raw measurement tables
+CREATE TABLE IF NOT EXISTS dim_vps (
+    kind LowCardinality(String),
+    vp String,
+    first_seen SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen SimpleAggregateFunction(max, DateTime64(3))
+) ENGINE = AggregatingMergeTree()
+ORDER BY (kind, vp);
+
+CREATE TABLE IF NOT EXISTS dim_destinations (
+    kind LowCardinality(String),
+    destination IPv6,
+    first_seen SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen SimpleAggregateFunction(max, DateTime64(3))
+) ENGINE = AggregatingMergeTree()
+ORDER BY (kind, destination);
+
+CREATE TABLE IF NOT EXISTS dim_nameservers (
+    nameserver IPv6,
+    first_seen SimpleAggregateFunction(min, DateTime64(3)),
+    last_seen SimpleAggregateFunction(max, DateTime64(3))
+) ENGINE = AggregatingMergeTree()
+ORDER BY nameserver;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_vps_ping_mv TO dim_vps AS
+SELECT 'ping' AS kind, vp, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM ping_measurements
+GROUP BY vp;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_vps_trace_mv TO dim_vps AS
+SELECT 'trace' AS kind, vp, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM traceroute_measurements
+GROUP BY vp;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_vps_dns_mv TO dim_vps AS
+SELECT 'dns' AS kind, vp, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM dns_measurements
+GROUP BY vp;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_destinations_ping_mv TO dim_destinations AS
+SELECT 'ping' AS kind, destination, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM ping_measurements
+GROUP BY destination;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_destinations_trace_mv TO dim_destinations AS
+SELECT 'trace' AS kind, destination, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM traceroute_measurements
+GROUP BY destination;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS dim_nameservers_mv TO dim_nameservers AS
+SELECT nameserver, min(timestamp) AS first_seen, max(timestamp) AS last_seen
+FROM dns_measurements
+GROUP BY nameserver;
+
 -- Create views for common analytics queries
 CREATE VIEW IF NOT EXISTS ping_stats AS
 SELECT
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingest and dashboard-query scaling from one node to N shards
+Run once against docker-compose.yml (single node) and once against
+docker-compose.cluster.yml with --shard per node, then compare the output.
+Everything goes into a scratch database built from the schema files and
+dropped at the end; the scamper tables are never touched
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+
+try:
+    from clickhouse_driver import Client
+except ImportError as e:
+    print(f"Missing required dependencies: {e}")
+    sys.exit(1)
+
+from shard_router import ShardRouter
+
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Clickhouse')
+CLUSTER = 'scamper_cluster'
+
+# Dashboard-like queries over the last day of synthetic data
+QUERIES = [
+    ('latency panel',
+     "SELECT timestamp, rtt_min, vp, destination FROM ping_measurements "
+     "WHERE timestamp >= now() - INTERVAL 6 HOUR AND vp IN ('vp1.ark.caida.org', 'vp2.ark.caida.org') "
+     "ORDER BY timestamp"),
+    ('p95 per vp/destination',
+     "SELECT vp, destination, quantile(0.95)(rtt_avg) FROM ping_measurements "
+     "WHERE timestamp >= now() - INTERVAL 1 DAY GROUP BY vp, destination"),
+    ('hourly ping_stats',
+     "SELECT * FROM ping_stats WHERE hour >= now() - INTERVAL 1 DAY"),
+]
+
+
+def synthetic_pings(count: int, vps: int = 50, targets: int = 500):
+    """Ping rows spread over the last day, shaped like the loader's batches"""
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        rtt = random.uniform(10, 110)
+        yield {
+            'timestamp': now - timedelta(seconds=i % 86400),
+            'measurement_id': f"ping_bench_{i}",
+            'vp': f"vp{i % vps}.ark.caida.org",
+            'source': '::ffff:192.168.1.100',
+            'destination': f"::ffff:10.0.{(i % targets) // 256}.{(i % targets) % 256}",
+            'rtt_avg': rtt,
+            'rtt_min': rtt * 0.9,
+            'rtt_max': rtt * 1.1,
+            'packet_loss': 0.0,
+            'probe_count': 3,
+            'probe_size': 56
+        }
+
+
+def build_batches(rows: int, batch_size: int) -> list:
+    """Generate all synthetic rows up front, split into loader-sized batches"""
+    pings = list(synthetic_pings(rows))
+    return [pings[i:i + batch_size] for i in range(0, rows, batch_size)]
+
+
+def schema_statements(schema_file: str, database: str):
+    """Split a schema file into single statements for the scratch database;
+    Keeper paths and Distributed targets naming scamper are renamed to it"""
+    with open(schema_file) as f:
+        sql = re.sub(r'--.*', '', f.read())
+    sql = re.sub(r'\bscamper\b', database, sql)
+    for statement in sql.split(';'):
+        statement = statement.strip()
+        if not statement or statement.startswith(('CREATE DATABASE', 'USE ')):
+            continue
+        yield statement
+
+
+def create_database(host: str, port: int, database: str, cluster: bool) -> Client:
+    """(Re)create the scratch database, ON CLUSTER for a sharded setup; returns a client using it"""
+    on_cluster = f' ON CLUSTER {CLUSTER}' if cluster else ''
+    admin = Client(host=host, port=port)
+    # SYNC also removes the replicated tables' Keeper paths, so they can be recreated
+    admin.execute(f'DROP DATABASE IF EXISTS {database}{on_cluster} SYNC')
+    admin.execute(f'CREATE DATABASE {database}{on_cluster}')
+
+    client = Client(host=host, port=port, database=database)
+    schema_file = os.path.join(SCHEMA_DIR, 'schema-cluster.sql' if cluster else 'schema.sql')
+    for statement in schema_statements(schema_file, database):
+        client.execute(statement)
+    return client
+
+
+def drop_database(host: str, port: int, database: str, cluster: bool):
+    on_cluster = f' ON CLUSTER {CLUSTER}' if cluster else ''
+    Client(host=host, port=port).execute(f'DROP DATABASE IF EXISTS {database}{on_cluster} SYNC')
+
+
+def ingest(insert, batches: list) -> float:
+    """Insert pre-built batches; only the inserts are timed. Returns rows/s"""
+    rows = sum(len(batch) for batch in batches)
+    start = time.perf_counter()
+    for batch in batches:
+        insert(batch)
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ingest and query scaling across ClickHouse shards')
+    parser.add_argument('--host', default='localhost', help='ClickHouse host for queries and Distributed inserts')
+    parser.add_argument('--port', type=int, default=9000, help='ClickHouse port')
+    parser.add_argument('--shard', action='append', dest='shards',
+                        help='Shard host:port in cluster order, repeat per shard (omit for a single node)')
+    parser.add_argument('--database', default='scamper_bench', help='Scratch database (dropped and recreated)')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic ping rows per ingest run')
+    parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per query')
+
+    args = parser.parse_args()
+    if args.database == 'scamper':
+        parser.error("--database must be a scratch database, not scamper")
+
+    cluster = bool(args.shards)
+    nodes = len(args.shards) if cluster else 1
+
+    print(f"Nodes: {nodes}")
+    batches = build_batches(args.rows, args.batch_size)
+    try:
+        # Each ingest run starts from an empty database, so every layout ends with --rows rows
+        client = create_database(args.host, args.port, args.database, cluster)
+        if not cluster:
+            rate = ingest(lambda rows: client.execute('INSERT INTO ping_measurements VALUES', rows), batches)
+            print(f"ingest, single node: {rate:,.0f} rows/s")
+        else:
+            # Synchronous so the timing includes forwarding to the remote shards
+            rate = ingest(lambda rows: client.execute('INSERT INTO ping_measurements VALUES', rows,
+                                                      settings={'insert_distributed_sync': 1}),
+                          batches)
+            print(f"ingest, via Distributed table: {rate:,.0f} rows/s")
+            client = create_database(args.host, args.port, args.database, cluster)
+            router = ShardRouter(args.shards, args.database)
+            rate = ingest(lambda rows: router.insert('ping_measurements', rows), batches)
+            print(f"ingest, routed to shard-local tables: {rate:,.0f} rows/s")
+
+        total = client.execute('SELECT count() FROM ping_measurements')[0][0]
+        print(f"ping_measurements rows: {total:,}")
+
+        for name, query in QUERIES:
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                client.execute(query)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"query {name}: {statistics.median(timings):.1f} ms median of {args.runs}")
+    finally:
+        drop_database(args.host, args.port, args.database, cluster)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Self-check for clickhouse_queries: result cache and streaming fetch
+Usage: ./check_clickhouse_queries.py (no ClickHouse server needed)
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+from clickhouse_queries import MeasurementQueries, QueryCache
+
+PING_COLUMNS = [('timestamp', 'DateTime64(3)'), ('vp', 'String'), ('destination', 'String'),
+                ('rtt_avg', 'Float32'), ('rtt_min', 'Float32'), ('rtt_max', 'Float32'),
+                ('packet_loss', 'Float32')]
+
+
+class FakeClient:
+    """Stands in for clickhouse_driver.Client, recording every query it serves"""
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.calls = []
+
+    def execute_iter(self, query, params, with_column_types=False):
+        self.calls.append(params)
+        yield PING_COLUMNS
+        yield from self.rows
+
+
+def ping_rows(count: int) -> list:
+    return [(datetime(2025, 9, 20, 5, 14, i % 60), 'sea3-us.ark.caida.org', '::ffff:1.1.1.1',
+             10.0 + i, 9.0 + i, 11.0 + i, 0.0) for i in range(count)]
+
+
+def queries(rows: list, **kwargs) -> MeasurementQueries:
+    queries = MeasurementQueries(**kwargs)
+    queries.client = FakeClient(rows)
+    return queries
+
+
+def check_streaming():
+    """Chunked fetch yields typed arrays with every row, across chunk boundaries"""
+    api = queries(ping_rows(25))
+    api.chunk_size = 10
+    result = api.latency()
+    assert len(result['rtt_avg']) == 25
+    assert str(result['rtt_avg'].dtype) == 'float32'
+    assert str(result['timestamp'].dtype) == 'datetime64[ms]'
+    assert result['rtt_avg'][-1] == 34.0
+
+
+def check_empty_result():
+    """An empty result gives zero-length typed columns and an empty DataFrame"""
+    api = queries([])
+    result = api.latency()
+    assert set(result) == {name for name, _ in PING_COLUMNS}
+    assert len(result['rtt_avg']) == 0 and str(result['rtt_avg'].dtype) == 'float32'
+    assert len(api.latency(as_dataframe=True)) == 0
+
+
+def check_cache_hit_and_isolation():
+    """Repeated calls hit the cache; callers cannot change what later calls see"""
+    api = queries(ping_rows(5))
+    first = api.latency(vp='sea3-us.ark.caida.org')
+    first['extra'] = None
+    del first['vp']
+    try:
+        first['rtt_avg'][0] = 0.0
+        raise AssertionError("cached arrays are writeable")
+    except ValueError:
+        pass
+
+    second = api.latency(vp='sea3-us.ark.caida.org')
+    assert len(api.client.calls) == 1
+    assert 'extra' not in second and 'vp' in second and second['rtt_avg'][0] == 10.0
+
+
+def check_bucket_keying():
+    """Implicit windows are bucket-aligned and shared; explicit windows are used as given"""
+    api = queries(ping_rows(5), bucket_seconds=3600)
+    api.latency()
+    api.latency()
+    assert len(api.client.calls) == 1
+    params = api.client.calls[0]
+    assert params['end'].minute == 0 and params['end'].second == 0
+    assert params['end'] - params['start'] == timedelta(days=1)
+
+    start = datetime(2025, 9, 20, 10, 0, 30, tzinfo=timezone.utc)
+    end = datetime(2025, 9, 20, 10, 5, 30, tzinfo=timezone.utc)
+    api.latency(start, end)
+    assert api.client.calls[-1]['start'] == start and api.client.calls[-1]['end'] == end
+
+    api.latency(start, datetime(2025, 9, 20, 10, 5, 31, tzinfo=timezone.utc))
+    assert len(api.client.calls) == 3
+
+
+def check_ttl_expiry():
+    """Entries expire after the TTL and are fetched again"""
+    api = queries(ping_rows(5), cache_ttl=0.05)
+    api.latency()
+    time.sleep(0.1)
+    api.latency()
+    assert len(api.client.calls) == 2
+
+
+def check_lru_eviction():
+    """The least recently used entry is evicted first"""
+    cache = QueryCache(max_entries=2, ttl=60)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def main():
+    checks = [check_streaming, check_empty_result, check_cache_hit_and_isolation,
+              check_bucket_keying, check_ttl_expiry, check_lru_eviction]
+    for check in checks:
+        check()
+        print(f"✓ {check.__doc__}")
+    print(f"✓ All {len(checks)} checks passed")
+
+
+if __name__ == '__main__':
+    main()
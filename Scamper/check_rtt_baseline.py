@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Self-check for rtt_baseline: feeds synthetic series through RttBaselineTracker
+Usage: ./check_rtt_baseline.py (no ClickHouse or scamper needed)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+try:
+    import numpy as np
+except ImportError as e:
+    print(f"Missing required dependencies: {e}")
+    sys.exit(1)
+
+from rtt_baseline import RttBaselineTracker, SeriesStats, ewma_batch, ewma_trajectory
+
+BASE_TIME = datetime(2025, 9, 20, tzinfo=timezone.utc)
+
+
+def ping_records(rtts, start: int = 0, vp: str = 'sea3-us.ark.caida.org', destination: str = '::ffff:1.1.1.1'):
+    """Loader-shaped ping records, one second apart; NaN RTT means a fully lost ping"""
+    return [{
+        'timestamp': BASE_TIME + timedelta(seconds=start + i),
+        'vp': vp,
+        'destination': destination,
+        'rtt_avg': None if np.isnan(rtt) else float(rtt),
+        'packet_loss': 1.0 if np.isnan(rtt) else 0.0
+    } for i, rtt in enumerate(rtts)]
+
+
+def feed(tracker: RttBaselineTracker, rtts, batch: int = 50, start: int = 0):
+    """Feed RTTs in loader-sized batches; returns (sample index, event) pairs"""
+    events = []
+    for offset in range(0, len(rtts), batch):
+        for event in tracker.update_ping(ping_records(rtts[offset:offset + batch], start + offset)):
+            index = int((event[0] - BASE_TIME).total_seconds())
+            events.append((index, event[4]))
+    return events
+
+
+def check_ewma_batch():
+    """Closed-form batch EWMA matches the sequential per-sample update"""
+    values = np.random.default_rng(1).uniform(5, 200, 300)
+    for alpha in (0.01, 0.2):
+        expected = 42.0
+        for value in values:
+            expected = (1 - alpha) * expected + alpha * value
+        assert abs(ewma_batch(42.0, values, alpha) - expected) < 1e-9
+        assert abs(ewma_trajectory(42.0, values, alpha)[-1] - expected) < 1e-9
+
+
+def check_quantiles():
+    """Histogram quantiles stay within the sketch's ~2.5% relative error"""
+    values = np.random.default_rng(2).lognormal(np.log(40), 0.3, 5000)
+    stats = SeriesStats()
+    # slow_alpha near zero so the sketch holds (almost) all samples equally
+    stats.update(values, np.zeros(len(values)), 1e-9, 0.2)
+    for q in (0.5, 0.95):
+        exact = np.quantile(values, q)
+        assert abs(stats.quantile(q) - exact) / exact < 0.03, (q, stats.quantile(q), exact)
+
+
+def check_step_change():
+    """A 20 ms -> 60 ms step raises one rtt_increase shortly after the step"""
+    rng = np.random.default_rng(3)
+    rtts = np.concatenate([20 + rng.normal(0, 1, 1000), 60 + rng.normal(0, 1, 1000)])
+    events = feed(RttBaselineTracker(), rtts)
+
+    assert events, "no events for a 3x RTT step"
+    index, event = events[0]
+    assert event == 'rtt_increase' and 1000 <= index < 1100, events
+    assert all(name != 'rtt_increase' for _, name in events[1:]), events
+
+
+def check_transient_shift():
+    """A shift that starts and ends inside one 1000-sample batch is reported at the right samples"""
+    rng = np.random.default_rng(6)
+    rtts = np.concatenate([20 + rng.normal(0, 1, 1300), 80 + rng.normal(0, 1, 300),
+                           20 + rng.normal(0, 1, 400)])
+    events = feed(RttBaselineTracker(), rtts, batch=1000)
+
+    assert [name for _, name in events] == ['rtt_increase', 'rtt_settled'], events
+    assert 1300 <= events[0][0] < 1305 and 1600 <= events[1][0] < 1620, events
+
+
+def check_new_level_adopted():
+    """A lasting step is stamped at the step, then adopted as the new baseline"""
+    rng = np.random.default_rng(7)
+    rtts = np.concatenate([20 + rng.normal(0, 1, 1000), 60 + rng.normal(0, 1, 1500),
+                           20 + rng.normal(0, 1, 500)])
+    events = feed(RttBaselineTracker(), rtts, batch=1000)
+
+    assert [name for _, name in events] == ['rtt_increase', 'rtt_rebaselined', 'rtt_decrease'], events
+    assert 1000 <= events[0][0] < 1005, events
+    assert events[1][0] == events[0][0] + 1000, events
+    assert 2500 <= events[2][0] < 2510, events
+
+
+def check_steady_series():
+    """Noise around a stable level raises no events"""
+    rtts = 30 + np.random.default_rng(4).normal(0, 2, 2000)
+    assert feed(RttBaselineTracker(), rtts) == []
+
+
+def check_loss():
+    """A run of fully lost pings raises loss_increase"""
+    rtts = np.concatenate([np.full(500, 25.0), np.full(100, np.nan)])
+    events = feed(RttBaselineTracker(), rtts)
+    assert any(name == 'loss_increase' and index >= 500 for index, name in events), events
+
+
+def check_dns_timeouts():
+    """DNS timeouts count as loss; NXDOMAIN answers do not"""
+    tracker = RttBaselineTracker()
+    records = [{
+        'timestamp': BASE_TIME + timedelta(seconds=i),
+        'vp': 'sea3-us.ark.caida.org',
+        'nameserver': '::ffff:1.1.1.1',
+        'response_code': 3,
+        'rtt': 15.0 if i < 500 else None
+    } for i in range(600)]
+
+    events = []
+    for offset in range(0, len(records), 50):
+        events.extend(tracker.update_dns(records[offset:offset + 50]))
+    names = [event[4] for event in events]
+    assert names == ['loss_increase'], names
+
+
+def check_checkpoint_resume():
+    """A reloaded checkpoint has the same state and skips samples already seen"""
+    rtts = 20 + np.random.default_rng(5).normal(0, 1, 500)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        checkpoint = os.path.join(tmp_dir, 'baselines.json')
+        tracker = RttBaselineTracker(checkpoint)
+        feed(tracker, rtts)
+        tracker.save_checkpoint(force=True)
+
+        resumed = RttBaselineTracker(checkpoint)
+        before = resumed.series[('ping', 'sea3-us.ark.caida.org', '::ffff:1.1.1.1')]
+        original = tracker.series[('ping', 'sea3-us.ark.caida.org', '::ffff:1.1.1.1')]
+        assert before.to_dict() == original.to_dict()
+
+        assert feed(resumed, rtts) == []
+        assert before.count == original.count
+
+
+def main():
+    checks = [check_ewma_batch, check_quantiles, check_step_change, check_transient_shift,
+              check_new_level_adopted, check_steady_series, check_loss, check_dns_timeouts,
+              check_checkpoint_resume]
+    for check in checks:
+        check()
+        print(f"✓ {check.__doc__}")
+    print(f"✓ All {len(checks)} checks passed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Self-check for shard_router: shard choice must match ClickHouse's Distributed tables
+Usage: ./check_shard_router.py [--host HOST --port PORT]
+Without --host, checks against cityHash64 values recorded from ClickHouse 26.9;
+with --host, also asks that server for cityHash64(key) % N directly
+"""
+
+import sys
+import argparse
+
+from shard_router import shard_index
+
+# SELECT cityHash64(key) on ClickHouse 26.9
+KNOWN_CITYHASH64 = {
+    'sea3-us.ark.caida.org': 3363003997286206622,
+    'vp1.ark.caida.org': 7073287910015176061,
+    'san-us.ark.caida.org': 6284415165711899674,
+    '': 11160318154034397263,
+    'ping_1758345274.123_-4011257617427870581': 7256510043570985985,
+    'trace_1758669914.0_6245102306126153431': 17816067441336786140,
+    'zürich-ch.ark.caida.org': 1414086749490306149,
+}
+
+SHARD_COUNTS = (1, 2, 3, 4, 7)
+
+
+def check_known_values():
+    """shard_index matches recorded cityHash64(key) % N"""
+    for key, value in KNOWN_CITYHASH64.items():
+        for shards in SHARD_COUNTS:
+            assert shard_index(key, shards) == value % shards, (key, shards)
+
+
+def check_server(host: str, port: int):
+    """shard_index matches cityHash64(key) % N computed by a live server"""
+    from clickhouse_driver import Client
+
+    client = Client(host=host, port=port)
+    for key in KNOWN_CITYHASH64:
+        for shards in SHARD_COUNTS:
+            expected = client.execute('SELECT cityHash64(%(key)s) %% %(shards)s',
+                                      {'key': key, 'shards': shards})[0][0]
+            assert shard_index(key, shards) == expected, (key, shards)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check shard routing against ClickHouse cityHash64')
+    parser.add_argument('--host', help='ClickHouse host to compare against (optional)')
+    parser.add_argument('--port', type=int, default=9000, help='ClickHouse port')
+
+    args = parser.parse_args()
+
+    try:
+        check_known_values()
+        print(f"✓ {check_known_values.__doc__}")
+        if args.host:
+            check_server(args.host, args.port)
+            print(f"✓ {check_server.__doc__}")
+    except AssertionError as e:
+        print(f"✗ Shard routing does not match ClickHouse for {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
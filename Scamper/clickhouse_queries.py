@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Analytics query API for scamper measurements stored in ClickHouse
+Streams results into NumPy arrays (or pandas DataFrames) and caches them
+"""
+
+import sys
+import time
+import argparse
+import logging
+import ipaddress
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+try:
+    import numpy as np
+    from clickhouse_driver import Client
+except ImportError as e:
+    print(f"Missing required dependencies: {e}")
+    sys.exit(1)
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+# ClickHouse column type -> NumPy dtype; anything not listed stays as object
+NUMPY_DTYPES = {
+    'Float32': np.float32,
+    'Float64': np.float64,
+    'UInt8': np.uint8,
+    'UInt16': np.uint16,
+    'UInt32': np.uint32,
+    'UInt64': np.uint64,
+    'Int8': np.int8,
+    'Int16': np.int16,
+    'Int32': np.int32,
+    'Int64': np.int64,
+}
+
+
+def normalize_ip(addr) -> str:
+    """Convert IP address to IPv6 format, matching how the loader stores it"""
+    if addr is None:
+        return None
+    ip = ipaddress.ip_address(addr)
+    if isinstance(ip, ipaddress.IPv4Address):
+        return str(ipaddress.IPv6Address(f"::ffff:{ip}"))
+    return str(ip)
+
+
+def numpy_dtype(column_type: str):
+    """Map a ClickHouse column type to the NumPy dtype used for it"""
+    if column_type.startswith('DateTime64'):
+        return 'datetime64[ms]'
+    if column_type.startswith('DateTime'):
+        return 'datetime64[s]'
+    return NUMPY_DTYPES.get(column_type, object)
+
+
+class QueryCache:
+    """TTL + LRU cache for query results"""
+
+    def __init__(self, max_entries: int = 128, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self.entries[key]
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store value under key, evicting the least recently used entries"""
+        self.entries[key] = (time.monotonic(), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class MeasurementQueries:
+    def __init__(self, clickhouse_host: str = 'localhost', clickhouse_port: int = 9000, clickhouse_database: str = 'scamper',
+                 cache_ttl: float = 60.0, cache_size: int = 128, bucket_seconds: int = 60):
+        self.client = Client(host=clickhouse_host, port=clickhouse_port, database=clickhouse_database)
+        self.cache = QueryCache(max_entries=cache_size, ttl=cache_ttl)
+        self.bucket_seconds = bucket_seconds
+        self.chunk_size = 10000
+
+        logging.basicConfig(level=logging.INFO)
+        self.logger = logging.getLogger(__name__)
+
+    def time_window(self, start: datetime, end: datetime):
+        """Fill in a default window ending now, aligned to time buckets so nearby calls share a cache entry"""
+        # Only the implicit bounds are rounded; explicit ones are used as given
+        bucket = self.bucket_seconds
+        if end is None:
+            end_ts = -(-int(datetime.now(timezone.utc).timestamp()) // bucket) * bucket
+            end = datetime.fromtimestamp(end_ts, timezone.utc)
+        if start is None:
+            start_ts = int((end - timedelta(days=1)).timestamp()) // bucket * bucket
+            start = datetime.fromtimestamp(start_ts, timezone.utc)
+        return start, end
+
+    def stream_columns(self, query: str, params: dict) -> dict:
+        """Run query with execute_iter and collect the rows into NumPy column arrays"""
+        rows = self.client.execute_iter(query, params, with_column_types=True)
+        column_types = next(rows)
+        dtypes = [numpy_dtype(column_type) for _, column_type in column_types]
+        chunks = [[np.empty(0, dtype=dtype)] for dtype in dtypes]
+
+        # Convert each chunk of rows to typed arrays as it arrives, so at most
+        # chunk_size rows are held as Python tuples at a time
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            for values, dtype, column in zip(zip(*chunk), dtypes, chunks):
+                column.append(np.asarray(values, dtype=dtype))
+
+        result = {
+            name: np.concatenate(column)
+            for (name, _), column in zip(column_types, chunks)
+        }
+        # Results are shared through the cache, so callers must not modify them in place
+        for array in result.values():
+            array.flags.writeable = False
+        return result
+
+    def run(self, query: str, params: dict, as_dataframe: bool = False):
+        """Execute a parameterized query, serving repeated calls from the cache"""
+        key = (query, tuple(sorted(params.items())))
+        result = self.cache.get(key)
+        if result is None:
+            result = self.stream_columns(query, params)
+            self.cache.put(key, result)
+            self.logger.debug(f"Cache miss, fetched {len(next(iter(result.values()), []))} rows")
+
+        if as_dataframe:
+            if pd is None:
+                raise RuntimeError("pandas is required for DataFrame results")
+            return pd.DataFrame(result)
+        # A new dict per call, so adding or replacing keys does not touch the cache
+        return dict(result)
+
+    def filters(self, conditions: list, params: dict, table: str, **values):
+        """Append an equality condition for each filter value that is set"""
+        # Qualified so the filter hits the stored IPv6 column, not the
+        # same-named IPv6NumToString alias in the SELECT list
+        for column, (expression, value) in values.items():
+            if value is not None:
+                conditions.append(f"{table}.{column} = {expression}")
+                params[column] = value
+
+    def latency(self, start: datetime = None, end: datetime = None, vp: str = None, destination: str = None,
+                as_dataframe: bool = False):
+        """Ping RTT and loss per vp/destination over a time window"""
+        start, end = self.time_window(start, end)
+        params = {'start': start, 'end': end}
+        conditions = ["timestamp >= %(start)s", "timestamp < %(end)s"]
+        self.filters(conditions, params, 'ping_measurements',
+                     vp=('%(vp)s', vp),
+                     destination=('toIPv6(%(destination)s)', normalize_ip(destination)))
+
+        query = f"""
+            SELECT timestamp, vp, IPv6NumToString(destination) AS destination,
+                   rtt_avg, rtt_min, rtt_max, packet_loss
+            FROM ping_measurements
+            WHERE {' AND '.join(conditions)}
+            ORDER BY vp, destination, timestamp
+        """
+        return self.run(query, params, as_dataframe)
+
+    def dns_success_rate(self, start: datetime = None, end: datetime = None, vp: str = None, nameserver: str = None,
+                         interval_seconds: int = 3600, as_dataframe: bool = False):
+        """DNS success rate (NOERROR responses) per vp/nameserver per interval"""
+        start, end = self.time_window(start, end)
+        params = {'start': start, 'end': end, 'interval': interval_seconds}
+        conditions = ["timestamp >= %(start)s", "timestamp < %(end)s"]
+        self.filters(conditions, params, 'dns_measurements',
+                     vp=('%(vp)s', vp),
+                     nameserver=('toIPv6(%(nameserver)s)', normalize_ip(nameserver)))
+
+        query = f"""
+            SELECT toStartOfInterval(timestamp, toIntervalSecond(%(interval)s)) AS bucket,
+                   vp, IPv6NumToString(nameserver) AS nameserver,
+                   countIf(response_code = 0) AS successful_queries,
+                   count() AS total_queries,
+                   successful_queries / total_queries AS success_rate
+            FROM dns_measurements
+            WHERE {' AND '.join(conditions)}
+            GROUP BY bucket, vp, nameserver
+            ORDER BY vp, nameserver, bucket
+        """
+        return self.run(query, params, as_dataframe)
+
+    def hop_rtt_profile(self, start: datetime = None, end: datetime = None, vp: str = None, destination: str = None,
+                        as_dataframe: bool = False):
+        """Per-hop RTT profile of each traceroute over a time window"""
+        start, end = self.time_window(start, end)
+        params = {'start': start, 'end': end}
+        conditions = ["timestamp >= %(start)s", "timestamp < %(end)s"]
+        self.filters(conditions, params, 'traceroute_measurements',
+                     vp=('%(vp)s', vp),
+                     destination=('toIPv6(%(destination)s)', normalize_ip(destination)))
+
+        query = f"""
+            SELECT h.measurement_id AS measurement_id, t.timestamp AS timestamp, t.vp AS vp,
+                   IPv6NumToString(h.destination) AS destination,
+                   h.hop_number AS hop_number, h.rtt AS rtt
+            FROM traceroute_hops AS h
+            INNER JOIN (
+                SELECT measurement_id, timestamp, vp
+                FROM traceroute_measurements
+                WHERE {' AND '.join(conditions)}
+            ) AS t ON h.measurement_id = t.measurement_id
+            WHERE h.timestamp >= %(start)s AND h.timestamp < %(end)s
+            ORDER BY measurement_id, hop_number
+        """
+        return self.run(query, params, as_dataframe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query scamper measurements from ClickHouse')
+    parser.add_argument('query', choices=['latency', 'dns', 'hops'], help='Query to run')
+    parser.add_argument('--host', default='localhost', help='ClickHouse host')
+    parser.add_argument('--port', type=int, default=9000, help='ClickHouse port')
+    parser.add_argument('--hours', type=int, default=24, help='Window size in hours, ending now')
+    parser.add_argument('--vp', help='Filter by vantage point')
+    parser.add_argument('--target', help='Filter by destination or nameserver address')
+
+    args = parser.parse_args()
+
+    queries = MeasurementQueries(args.host, args.port)
+    end = datetime.now(timezone.utc)
+    start = end - timedelta(hours=args.hours)
+
+    if args.query == 'latency':
+        result = queries.latency(start, end, vp=args.vp, destination=args.target)
+    elif args.query == 'dns':
+        result = queries.dns_success_rate(start, end, vp=args.vp, nameserver=args.target)
+    else:
+        result = queries.hop_rtt_profile(start, end, vp=args.vp, destination=args.target)
+
+    for name, column in result.items():
+        print(f"{name}: {len(column)} rows, dtype {column.dtype}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Incremental RTT baselines and change detection for the warts loader
+Keeps rolling statistics per (vp, destination) and (vp, nameserver) series
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import logging
+from datetime import datetime, timezone
+
+try:
+    import numpy as np
+except ImportError as e:
+    print(f"Missing required dependencies: {e}")
+    sys.exit(1)
+
+
+# Log-spaced histogram used as the streaming quantile sketch:
+# bin i covers [MIN_RTT * GAMMA**i, MIN_RTT * GAMMA**(i+1)), so every
+# quantile estimate is within ~2.5% of the true value
+MIN_RTT = 0.1
+MAX_RTT = 10000.0
+GAMMA = 1.05
+NUM_BINS = int(math.ceil(math.log(MAX_RTT / MIN_RTT) / math.log(GAMMA)))
+
+
+def ewma_batch(current: float, values: np.ndarray, alpha: float) -> float:
+    """Apply an EWMA update for each value in order, in closed form"""
+    n = len(values)
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1)
+    return (1 - alpha) ** n * current + float(np.dot(weights, values))
+
+
+def ewma_trajectory(current: float, values: np.ndarray, alpha: float, block: int = 256) -> np.ndarray:
+    """EWMA after each value in order; blocks keep (1 - alpha) ** -k within float range"""
+    trajectory = np.empty(len(values))
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        decay = (1 - alpha) ** np.arange(1, len(chunk) + 1)
+        trajectory[start:start + len(chunk)] = decay * (current + alpha * np.cumsum(chunk / decay))
+        current = trajectory[start + len(chunk) - 1]
+    return trajectory
+
+
+def fold_histogram(histogram: np.ndarray, rtts: np.ndarray, alpha: float):
+    """Decay the sketch with the same weights as an EWMA and add a batch of RTTs"""
+    n = len(rtts)
+    bins = np.log(np.clip(rtts, MIN_RTT, MAX_RTT) / MIN_RTT) / math.log(GAMMA)
+    bins = np.minimum(bins.astype(np.int64), NUM_BINS - 1)
+    histogram *= (1 - alpha) ** n
+    np.add.at(histogram, bins, (1 - alpha) ** np.arange(n - 1, -1, -1))
+
+
+class SeriesStats:
+    """Rolling statistics for one (vp, target) series"""
+
+    # While a series is shifted its baseline (slow EWMA and sketch, or slow
+    # loss) is frozen at the pre-shift level; RTTs seen during the shift are
+    # collected in shift_histogram in case the new level is adopted
+
+    def __init__(self):
+        self.count = 0
+        self.last_timestamp = 0.0
+        self.ewma = 0.0
+        self.fast_ewma = 0.0
+        self.loss = 0.0
+        self.fast_loss = 0.0
+        self.histogram = np.zeros(NUM_BINS)
+        self.shifted = False
+        self.loss_shifted = False
+        self.shift_samples = 0
+        self.loss_shift_samples = 0
+        self.shift_histogram = np.zeros(NUM_BINS)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the q-quantile of recent RTTs from the histogram"""
+        cumulative = np.cumsum(self.histogram)
+        if cumulative[-1] <= 0:
+            return float('nan')
+        index = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return MIN_RTT * GAMMA ** (min(index, NUM_BINS - 1) + 0.5)
+
+    def update(self, rtts: np.ndarray, losses: np.ndarray, slow_alpha: float, fast_alpha: float):
+        """Fold a time-ordered batch of samples into the statistics"""
+        answered = rtts[~np.isnan(rtts)]
+        if len(answered):
+            if not self.histogram.any():
+                self.ewma = self.fast_ewma = float(answered[0])
+            self.fast_ewma = ewma_batch(self.fast_ewma, answered, fast_alpha)
+            if self.shifted:
+                fold_histogram(self.shift_histogram, answered, slow_alpha)
+                self.shift_samples += len(answered)
+            else:
+                self.ewma = ewma_batch(self.ewma, answered, slow_alpha)
+                fold_histogram(self.histogram, answered, slow_alpha)
+
+        if self.count == 0:
+            self.loss = self.fast_loss = float(losses[0])
+        self.fast_loss = ewma_batch(self.fast_loss, losses, fast_alpha)
+        if self.loss_shifted:
+            self.loss_shift_samples += len(losses)
+        else:
+            self.loss = ewma_batch(self.loss, losses, slow_alpha)
+        self.count += len(losses)
+
+    def change_state(self, event: str):
+        """Apply the state change an rtt_events event records"""
+        if event in ('rtt_increase', 'rtt_decrease', 'rtt_settled', 'rtt_rebaselined'):
+            if event == 'rtt_rebaselined':
+                self.histogram = self.shift_histogram
+                self.ewma = self.fast_ewma
+            self.shifted = event in ('rtt_increase', 'rtt_decrease')
+            self.shift_samples = 0
+            self.shift_histogram = np.zeros(NUM_BINS)
+        else:
+            if event == 'loss_rebaselined':
+                self.loss = self.fast_loss
+            self.loss_shifted = event == 'loss_increase'
+            self.loss_shift_samples = 0
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'last_timestamp': self.last_timestamp,
+            'ewma': self.ewma,
+            'fast_ewma': self.fast_ewma,
+            'loss': self.loss,
+            'fast_loss': self.fast_loss,
+            'histogram': self.histogram.tolist(),
+            'shifted': self.shifted,
+            'loss_shifted': self.loss_shifted,
+            'shift_samples': self.shift_samples,
+            'loss_shift_samples': self.loss_shift_samples,
+            'shift_histogram': self.shift_histogram.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        stats = cls()
+        stats.count = data['count']
+        stats.last_timestamp = data['last_timestamp']
+        stats.ewma = data['ewma']
+        stats.fast_ewma = data['fast_ewma']
+        stats.loss = data['loss']
+        stats.fast_loss = data['fast_loss']
+        stats.histogram = np.asarray(data['histogram'], dtype=np.float64)
+        stats.shifted = data['shifted']
+        stats.loss_shifted = data['loss_shifted']
+        # Absent from checkpoints written before baselines were frozen during shifts
+        stats.shift_samples = data.get('shift_samples', 0)
+        stats.loss_shift_samples = data.get('loss_shift_samples', 0)
+        if 'shift_histogram' in data:
+            stats.shift_histogram = np.asarray(data['shift_histogram'], dtype=np.float64)
+        return stats
+
+
+class RttBaselineTracker:
+    """Per-series RTT baselines, checkpointed to a JSON file between runs"""
+
+    # Samples of a series must arrive in time order: anything not newer than
+    # the last sample folded into that series is skipped (and logged). This
+    # is also what lets a restarted load resume from the checkpoint.
+
+    def __init__(self, checkpoint_file: str = None, slow_alpha: float = 0.01, fast_alpha: float = 0.2,
+                 warmup: int = 50, shift_ratio: float = 0.5, min_shift_ms: float = 5.0, loss_shift: float = 0.2,
+                 adopt_after: int = 1000, checkpoint_interval: float = 60.0):
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self.last_checkpoint = time.monotonic()
+        self.slow_alpha = slow_alpha
+        self.fast_alpha = fast_alpha
+        self.warmup = warmup
+        self.shift_ratio = shift_ratio
+        self.min_shift_ms = min_shift_ms
+        self.loss_shift = loss_shift
+        self.adopt_after = adopt_after
+        self.series = {}
+
+        self.logger = logging.getLogger(__name__)
+
+        if checkpoint_file and os.path.exists(checkpoint_file):
+            self.load_checkpoint()
+
+    def load_checkpoint(self):
+        """Restore series statistics from the checkpoint file"""
+        with open(self.checkpoint_file) as f:
+            data = json.load(f)
+        for entry in data['series']:
+            key = (entry['kind'], entry['vp'], entry['target'])
+            self.series[key] = SeriesStats.from_dict(entry['stats'])
+        self.logger.info(f"Loaded baselines for {len(self.series)} series from {self.checkpoint_file}")
+
+    def save_checkpoint(self, force: bool = False):
+        """Atomically write series statistics to the checkpoint file"""
+        # Rewriting every series is O(series), so unless forced (end of file)
+        # this runs at most once per checkpoint_interval, not on every batch
+        if not self.checkpoint_file:
+            return
+        if not force and time.monotonic() - self.last_checkpoint < self.checkpoint_interval:
+            return
+        data = {'series': [
+            {'kind': kind, 'vp': vp, 'target': target, 'stats': stats.to_dict()}
+            for (kind, vp, target), stats in self.series.items()
+        ]}
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_file, self.checkpoint_file)
+        self.last_checkpoint = time.monotonic()
+
+    def update_ping(self, records: list) -> list:
+        """Update (vp, destination) baselines from ping records; returns rtt_events rows"""
+        return self.update('ping',
+                           [(r['vp'], r['destination']) for r in records],
+                           [r['timestamp'].timestamp() for r in records],
+                           [r['rtt_avg'] if r['rtt_avg'] is not None else np.nan for r in records],
+                           [r['packet_loss'] for r in records])
+
+    def update_dns(self, records: list) -> list:
+        """Update (vp, nameserver) baselines from DNS records; returns rtt_events rows"""
+        # Loss is unanswered/total: timeouts arrive with rtt None, while any
+        # response, NXDOMAIN or SERVFAIL included, counts as answered
+        return self.update('dns',
+                           [(r['vp'], r['nameserver']) for r in records],
+                           [r['timestamp'].timestamp() for r in records],
+                           [r['rtt'] if r['rtt'] is not None else np.nan for r in records],
+                           [1.0 if r['rtt'] is None else 0.0 for r in records])
+
+    def update(self, kind: str, keys: list, timestamps: list, rtts: list, losses: list) -> list:
+        """Group a batch by series and fold each group in with vectorized updates"""
+        if not keys:
+            return []
+
+        series_ids, inverse = np.unique(np.array([f"{vp}|{target}" for vp, target in keys]),
+                                        return_inverse=True)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        rtts = np.asarray(rtts, dtype=np.float64)
+        losses = np.asarray(losses, dtype=np.float64)
+        order = np.lexsort((timestamps, inverse))
+        boundaries = np.searchsorted(inverse[order], np.arange(len(series_ids) + 1))
+
+        events = []
+        skipped = 0
+        for i, series_id in enumerate(series_ids):
+            idx = order[boundaries[i]:boundaries[i + 1]]
+            vp, target = series_id.split('|')
+            key = (kind, vp, target)
+            stats = self.series.get(key)
+            if stats is None:
+                stats = self.series[key] = SeriesStats()
+
+            # Skip samples already folded in before a restart, or out of order
+            newer = idx[timestamps[idx] > stats.last_timestamp]
+            skipped += len(idx) - len(newer)
+            idx = newer
+            if len(idx) == 0:
+                continue
+
+            events.extend(self.fold(key, stats, timestamps[idx], rtts[idx], losses[idx]))
+            stats.last_timestamp = float(timestamps[idx[-1]])
+
+        if skipped:
+            self.logger.warning(f"Skipped {skipped} {kind} samples not newer than their series' "
+                                f"last sample (already checkpointed or loaded out of time order)")
+        return events
+
+    def fold(self, key: tuple, stats: SeriesStats, timestamps: np.ndarray, rtts: np.ndarray,
+             losses: np.ndarray) -> list:
+        """Fold one series' samples in, split at every state change so each event
+        is stamped with the sample whose update crossed the threshold"""
+        kind, vp, target = key
+        events = []
+        while len(rtts):
+            end, changes = self.detect(stats, rtts, losses)
+            baseline, baseline_p95 = stats.quantile(0.5), stats.quantile(0.95)
+            stats.update(rtts[:end], losses[:end], self.slow_alpha, self.fast_alpha)
+            timestamp = datetime.fromtimestamp(float(timestamps[end - 1]), timezone.utc)
+            for event in changes:
+                events.append((timestamp, kind, vp, target, event, baseline, stats.fast_ewma,
+                               baseline_p95, stats.fast_loss, stats.count))
+                stats.change_state(event)
+            timestamps, rtts, losses = timestamps[end:], rtts[end:], losses[end:]
+        return events
+
+    def detect(self, stats: SeriesStats, rtts: np.ndarray, losses: np.ndarray):
+        """Find the first sample after which the series changes state, from the
+        per-sample fast averages against the (frozen) baseline.
+        Returns (samples up to and including it, events) or (all samples, [])"""
+        n = len(rtts)
+        positions = np.arange(n)
+        eligible = stats.count + positions >= self.warmup
+        candidates = []
+
+        baseline = stats.quantile(0.5)
+        answered = ~np.isnan(rtts)
+        if answered.any() and not math.isnan(baseline):
+            # Fast EWMA after each sample, carried over unanswered ones
+            fast = np.empty(n)
+            fast[answered] = ewma_trajectory(stats.fast_ewma, rtts[answered], self.fast_alpha)
+            last = np.maximum.accumulate(np.where(answered, positions, -1))
+            fast = np.where(last >= 0, fast[np.maximum(last, 0)], stats.fast_ewma)
+            delta = fast - baseline
+            outside = np.abs(delta) > max(self.shift_ratio * baseline, self.min_shift_ms)
+            if not stats.shifted:
+                hits = np.flatnonzero(eligible & outside)
+                if len(hits):
+                    candidates.append((hits[0], 'rtt_increase' if delta[hits[0]] > 0 else 'rtt_decrease'))
+            else:
+                hits = np.flatnonzero(~outside)
+                if len(hits):
+                    candidates.append((hits[0], 'rtt_settled'))
+                hits = np.flatnonzero(answered & (stats.shift_samples + np.cumsum(answered) >= self.adopt_after))
+                if len(hits):
+                    candidates.append((hits[0], 'rtt_rebaselined'))
+
+        start = float(losses[0]) if stats.count == 0 else stats.fast_loss
+        outside = ewma_trajectory(start, losses, self.fast_alpha) - stats.loss > self.loss_shift
+        if not stats.loss_shifted:
+            hits = np.flatnonzero(eligible & outside)
+            if len(hits):
+                candidates.append((hits[0], 'loss_increase'))
+        else:
+            hits = np.flatnonzero(~outside)
+            if len(hits):
+                candidates.append((hits[0], 'loss_settled'))
+            if stats.loss_shift_samples + n >= self.adopt_after:
+                candidates.append((self.adopt_after - stats.loss_shift_samples - 1, 'loss_rebaselined'))
+
+        if not candidates:
+            return n, []
+        first = min(index for index, _ in candidates)
+        changes = [event for index, event in candidates if index == first]
+        # Returning to the baseline takes precedence over adopting the new level
+        for settled, rebaselined in (('rtt_settled', 'rtt_rebaselined'), ('loss_settled', 'loss_rebaselined')):
+            if settled in changes and rebaselined in changes:
+                changes.remove(rebaselined)
+        return int(first) + 1, changes
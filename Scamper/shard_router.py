@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Shard-aware inserts for the sharded ClickHouse deployment
+Routes each row to the shard the Distributed table would pick for it and
+inserts straight into that shard's *_local table
+"""
+
+import sys
+import logging
+
+try:
+    from clickhouse_driver import Client
+except ImportError as e:
+    print(f"Missing required dependencies: {e}")
+    sys.exit(1)
+
+try:
+    from clickhouse_cityhash.cityhash import CityHash64
+except ImportError:
+    CityHash64 = None
+
+
+# Sharding key column per table, matching the Distributed tables in
+# Clickhouse/schema-cluster.sql
+SHARDING_KEYS = {
+    'ping_measurements': 'vp',
+    'traceroute_measurements': 'measurement_id',
+    'traceroute_hops': 'measurement_id',
+    'dns_measurements': 'vp',
+    'rtt_events': 'vp',
+}
+
+# Column positions for tables inserted as tuples rather than dicts
+TUPLE_KEY_INDEX = {
+    'rtt_events': 2,
+}
+
+
+def shard_index(key: str, shards: int) -> int:
+    """Shard for a sharding key; same as cityHash64(key) % shards with equal weights"""
+    if CityHash64 is None:
+        raise RuntimeError("clickhouse-cityhash is required for shard-aware inserts")
+    return CityHash64(key.encode('utf-8')) % shards
+
+
+class ShardRouter:
+    def __init__(self, shard_hosts: list, clickhouse_database: str = 'scamper'):
+        """shard_hosts lists one entry per shard in remote_servers order; an entry
+        may name several replicas of that shard as 'host:port,host:port'"""
+        if CityHash64 is None:
+            raise RuntimeError("clickhouse-cityhash is required for shard-aware inserts")
+
+        self.clients = []
+        for shard in shard_hosts:
+            replicas = shard.split(',')
+            host, port = self.parse_host(replicas[0])
+            self.clients.append(Client(host=host, port=port, database=clickhouse_database,
+                                       alt_hosts=','.join(replicas[1:]) or None))
+
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def parse_host(address: str):
+        host, _, port = address.partition(':')
+        return host, int(port) if port else 9000
+
+    def shard_for(self, key: str) -> int:
+        return shard_index(key, len(self.clients))
+
+    def insert(self, table: str, rows: list):
+        """Split rows by owning shard and insert each group into <table>_local"""
+        column = SHARDING_KEYS[table]
+        index = TUPLE_KEY_INDEX.get(table)
+
+        groups = [[] for _ in self.clients]
+        for row in rows:
+            key = row[index] if index is not None else row[column]
+            groups[self.shard_for(key)].append(row)
+
+        for shard, (client, group) in enumerate(zip(self.clients, groups)):
+            if group:
+                client.execute(f'INSERT INTO {table}_local VALUES', group)
+                self.logger.debug(f"Inserted {len(group)} rows into {table}_local on shard {shard + 1}")
+
+    def test_connection(self) -> bool:
+        """Test the connection to every shard"""
+        try:
+            for client in self.clients:
+                client.execute('SELECT 1')
+            return True
+        except Exception as e:
+            self.logger.error(f"ClickHouse shard connection failed: {e}")
+            return False
@@ -16,19 +16,32 @@ except ImportError as e:
     print(f"Missing required dependencies: {e}")
     sys.exit(1)
 
+from rtt_baseline import RttBaselineTracker
+from shard_router import ShardRouter
+
 
 class WartsClickHouseLoader:
-    def __init__(self, clickhouse_host: str = 'localhost', clickhouse_port: int = 9000, clickhouse_database: str = 'scamper'):
+    def __init__(self, clickhouse_host: str = 'localhost', clickhouse_port: int = 9000, clickhouse_database: str = 'scamper',
+                 baseline_checkpoint: str = None, track_baselines: bool = False, shard_hosts: list = None):
         self.client = Client(host=clickhouse_host, port=clickhouse_port, database=clickhouse_database)
+        # With shard_hosts, batches bypass the Distributed tables and go to each shard's *_local tables
+        self.router = ShardRouter(shard_hosts, clickhouse_database) if shard_hosts else None
         self.ping_batch = []
+        self.ping_loss_batch = []
         self.trace_batch = []
         self.trace_hops_batch = []
         self.dns_batch = []
+        self.dns_loss_batch = []
         self.batch_size = 1000
 
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
 
+        # Rolling RTT baselines, only kept when requested
+        self.baselines = None
+        if track_baselines or baseline_checkpoint:
+            self.baselines = RttBaselineTracker(baseline_checkpoint)
+
     def normalize_ip(self, addr) -> str:
         """Convert IP address to IPv6 format for ClickHouse"""
         if addr is None:
@@ -48,6 +61,15 @@ class WartsClickHouseLoader:
         try:
             # Check if we have valid RTT data
             if ping.avg_rtt is None:
+                # Fully lost pings still count towards the loss baseline
+                if self.baselines is not None:
+                    self.ping_loss_batch.append({
+                        'timestamp': ping.start,
+                        'vp': ping.list.monitor,
+                        'destination': self.normalize_ip(ping.dst),
+                        'rtt_avg': None,
+                        'packet_loss': 1.0
+                    })
                 return
 
             ping_data = {
@@ -115,6 +137,14 @@ class WartsClickHouseLoader:
         try:
             # Check if we have valid DNS data
             if dns.rtt is None:
+                # Unanswered queries still count towards the loss baseline
+                if self.baselines is not None:
+                    self.dns_loss_batch.append({
+                        'timestamp': dns.start,
+                        'vp': dns.list.monitor,
+                        'nameserver': self.normalize_ip(dns.dst),
+                        'rtt': None
+                    })
                 return
 
             dns_data = {
@@ -137,41 +167,53 @@ class WartsClickHouseLoader:
             # Continue processing other dns
 
 
-    def flush_batches(self):
+    def insert_rows(self, table: str, rows: list):
+        """Insert rows directly, or via the owning shards when sharded"""
+        if self.router is not None:
+            self.router.insert(table, rows)
+        else:
+            self.client.execute(f'INSERT INTO {table} VALUES', rows)
+
+    def flush_batches(self, final: bool = False):
         """Insert accumulated batches into ClickHouse"""
         try:
+            # Baselines read the batches before they are cleared below
+            events = []
+            if self.baselines is not None:
+                events.extend(self.baselines.update_ping(self.ping_batch + self.ping_loss_batch))
+                events.extend(self.baselines.update_dns(self.dns_batch + self.dns_loss_batch))
+                self.ping_loss_batch.clear()
+                self.dns_loss_batch.clear()
+
             if self.ping_batch:
-                self.client.execute(
-                    'INSERT INTO ping_measurements VALUES',
-                    self.ping_batch
-                )
+                self.insert_rows('ping_measurements', self.ping_batch)
                 self.logger.info(f"Inserted {len(self.ping_batch)} ping measurements")
                 self.ping_batch.clear()
 
             if self.trace_batch:
-                self.client.execute(
-                    'INSERT INTO traceroute_measurements VALUES',
-                    self.trace_batch
-                )
+                self.insert_rows('traceroute_measurements', self.trace_batch)
                 self.logger.info(f"Inserted {len(self.trace_batch)} traceroute measurements")
                 self.trace_batch.clear()
 
             if self.trace_hops_batch:
-                self.client.execute(
-                    'INSERT INTO traceroute_hops VALUES',
-                    self.trace_hops_batch
-                )
+                self.insert_rows('traceroute_hops', self.trace_hops_batch)
                 self.logger.info(f"Inserted {len(self.trace_hops_batch)} traceroute hops")
                 self.trace_hops_batch.clear()
 
             if self.dns_batch:
-                self.client.execute(
-                    'INSERT INTO dns_measurements VALUES',
-                    self.dns_batch
-                )
+                self.insert_rows('dns_measurements', self.dns_batch)
                 self.logger.info(f"Inserted {len(self.dns_batch)} dns measurements")
                 self.dns_batch.clear()
 
+            if events:
+                self.insert_rows('rtt_events', events)
+                self.logger.info(f"Inserted {len(events)} rtt events")
+
+            # Checkpoint only once everything it covers has been inserted;
+            # rate-limited by the tracker, forced at the end of each file
+            if self.baselines is not None:
+                self.baselines.save_checkpoint(force=final)
+
         except Exception as e:
             self.logger.error(f"Error inserting data: {e}")
             raise
@@ -197,7 +239,7 @@ class WartsClickHouseLoader:
                         self.flush_batches()
 
                 # Final flush
-                self.flush_batches()
+                self.flush_batches(final=True)
 
         except Exception as e:
             self.logger.error(f"Error processing {filename}: {e}")
@@ -207,6 +249,8 @@ class WartsClickHouseLoader:
         """Test ClickHouse connection"""
         try:
             result = self.client.execute('SELECT 1')
+            if self.router is not None and not self.router.test_connection():
+                return False
             self.logger.info("ClickHouse connection successful")
             return True
         except Exception as e:
@@ -220,10 +264,15 @@ def main():
     parser.add_argument('--host', default='localhost', help='ClickHouse host')
     parser.add_argument('--port', type=int, default=9000, help='ClickHouse port')
     parser.add_argument('--batch-size', type=int, default=1000, help='Batch size for inserts')
+    parser.add_argument('--shard', action='append', dest='shards',
+                        help='Shard host:port in cluster order, repeat per shard (comma-separate replicas)')
+    parser.add_argument('--baselines', action='store_true', help='Track RTT baselines and write rtt_events')
+    parser.add_argument('--baseline-checkpoint', help='Checkpoint file for RTT baselines (implies --baselines)')
 
     args = parser.parse_args()
 
-    loader = WartsClickHouseLoader(args.host, args.port)
+    loader = WartsClickHouseLoader(args.host, args.port, baseline_checkpoint=args.baseline_checkpoint,
+                                   track_baselines=args.baselines, shard_hosts=args.shards)
     loader.batch_size = args.batch_size
 
     if not loader.test_connection():